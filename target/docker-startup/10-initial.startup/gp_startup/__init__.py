@@ -4,4 +4,4 @@ Author: Sascha Falk <sascha@falk-online.eu>
 License: MIT License
 """
 
-from .gp_app import App
+from .gp_app import run
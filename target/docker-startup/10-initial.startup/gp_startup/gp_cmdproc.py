@@ -5,9 +5,9 @@ License: MIT License
 """
 
 import abc
-import sys
+from collections import defaultdict
 from .gp_log import Log
-from .gp_helpers import print_error, readline_if_no_tty
+from .gp_helpers import print_error, readline_if_no_tty, is_stdin_tty
 from .gp_errors import *
 
 
@@ -22,9 +22,6 @@ class PositionalArgument(object):
 
     """
 
-    def __init__(self):
-        raise NotImplementedError("Please use the parameterized constructor.")
-
     def __init__(self, name):
         """
         Initializes a new instance of the NamedArgument class.
@@ -47,9 +44,6 @@ class NamedArgument(object):
 
     """
 
-    def __init__(self):
-        raise NotImplementedError("Please use the parameterized constructor.")
-
     def __init__(self, name, from_stdin = False, min_occurrence = 0, max_occurrence = 1):
         """
         Initializes a new instance of the NamedArgument class.
@@ -74,6 +68,7 @@ class NamedArgument(object):
             raise ValueError("The argument must occur only once, if it should be read from stdin as well.")
 
         self.name = name
+        self._name_lower = name.lower()  # named arguments on the command line are matched case-insensitively
         self.from_stdin = from_stdin
         self.min_occurrence = min_occurrence
         self.max_occurrence = max_occurrence
@@ -93,6 +88,7 @@ class CommandProcessor(object):
 
 
     __cmdline_handlers = None
+    __handler_trie = None
     __exception_handlers = None
 
 
@@ -105,7 +101,8 @@ class CommandProcessor(object):
 
         """
         self.__cmdline_handlers = []
-        self.__exception_handlers = []
+        self.__handler_trie = {}
+        self.__exception_handlers = {}
 
 
     # -------------------------------------------------------------------------------------------------------------------------------------
@@ -125,12 +122,25 @@ class CommandProcessor(object):
 
         pos_args = []
         named_args = []
+        append_by_type = { PositionalArgument : pos_args.append, NamedArgument : named_args.append }
         for arg in args:
-            if type(arg) is PositionalArgument: pos_args.append(arg)
-            elif type(arg) is NamedArgument: named_args.append(arg)
-            else: raise TypeError("Only 'PositionalArgument' and 'NamedArgument' objects are expected, you specified a {0}.".format(type(arg)))
+            append = append_by_type.get(type(arg))
+            if append is None: raise TypeError("Only 'PositionalArgument' and 'NamedArgument' objects are expected, you specified a {0}.".format(type(arg)))
+            append(arg)
+
+        named_args_by_name = {}
+        for named_arg in named_args:
+            named_args_by_name.setdefault(named_arg._name_lower, named_arg)
+
+        self.__cmdline_handlers.append((handler, pos_args, named_args, named_args_by_name))
 
-        self.__cmdline_handlers.append((handler, pos_args, named_args))
+        # index the handler by its (lowercased) positional arguments
+        # (a node maps positional arguments to child nodes, the key None maps to the index of the handler ending at the node,
+        # the handler that was registered first wins)
+        node = self.__handler_trie
+        for pos_arg in pos_args:
+            node = node.setdefault(pos_arg.name.lower(), {})
+        node.setdefault(None, len(self.__cmdline_handlers) - 1)
 
 
     # -------------------------------------------------------------------------------------------------------------------------------------
@@ -138,14 +148,20 @@ class CommandProcessor(object):
 
     def add_exception_handler(self, handler, exception_type):
         """
-        Adds an exception handler that is called, when an exception of the specified type is thrown by a command line handler.
+        Adds an exception handler that is called, when an exception of the specified type (or a type deriving from it) is thrown
+        by a command line handler. If multiple handlers are registered for the same type, the first one is used.
+
+        The handler registered for the most derived type of the exception is called. Exceptions deriving from ExitCodeError
+        are only passed to handlers registered for ExitCodeError or a type deriving from it, handlers registered for base types
+        of ExitCodeError (e.g. Exception) do not catch them. Instead the message of the exception is printed and its exit code
+        is returned.
 
         Args:
             handler (callable)    : Handler to invoke
             exception_type (type) : Type of the exception to handle
         """
 
-        self.__exception_handlers.append((handler, exception_type))
+        self.__exception_handlers.setdefault(exception_type, handler)
 
 
     # -------------------------------------------------------------------------------------------------------------------------------------
@@ -172,23 +188,24 @@ class CommandProcessor(object):
 
         """
 
+        # determine once whether errors reach the console via the log
+        uses_stdio = Log.uses_stdio
+
         # split up positional arguments and named arguments
         # -------------------------------------------------------------------------------------------------------------
         specified_positional_arguments = []
-        specified_named_arguments = {}
+        specified_named_arguments = defaultdict(list)
         for arg in args:
             arg = arg.strip()
-            if arg.startswith("--"):
-                arg = arg[2:]
-                arg_tokens = arg.split("=")
-                key = arg_tokens[0].lower().strip()
+            if arg[:2] == "--":
+                key, _, value = arg[2:].partition("=")
+                key = key.lower().strip()
                 if len(key) > 0:
-                    if not key in specified_named_arguments: specified_named_arguments[key] = []
-                    specified_named_arguments[key].append("=".join(arg_tokens[1:]))
+                    specified_named_arguments[key].append(value)
                 else:
                     error = "Invalid named argument format."
                     Log.write_error(error)
-                    if not Log.uses_stdio: print_error(error)
+                    if not uses_stdio: print_error(error)
                     return EXIT_CODE_COMMAND_LINE_ARGUMENT_ERROR
             else:
                 specified_positional_arguments.append(arg)
@@ -196,26 +213,13 @@ class CommandProcessor(object):
         # find handler with a signature that matches best
         # -------------------------------------------------------------------------------------------------------------
 
-        best_fit_index = -1
-        best_fit_count = -1
-        for (index, registration) in enumerate(self.__cmdline_handlers):
-
-            method                        = registration[0]  # function
-            expected_positional_arguments = registration[1]  # list of PositionalArgument
-
-            # skip, if the handler needs more arguments than specified
-            if len(expected_positional_arguments) > len(specified_positional_arguments): continue
-
-            # determine the number of matching arguments
-            match_count = 0
-            for i in range(len(expected_positional_arguments)):
-                if (args[i].lower() != expected_positional_arguments[i].name.lower()): break
-                match_count = match_count + 1
-
-            # keep the handler with the most matching arguments
-            if (match_count == len(expected_positional_arguments) and match_count > best_fit_count):
-                best_fit_count = match_count
-                best_fit_index = index
+        # descend the handler index along the specified positional arguments and keep the handler with the most matching arguments
+        node = self.__handler_trie
+        best_fit_index = node.get(None, -1)
+        for arg in specified_positional_arguments:
+            node = node.get(arg.lower())
+            if node is None: break
+            best_fit_index = node.get(None, best_fit_index)
 
         # call the determined command handler
         # -------------------------------------------------------------------------------------------------------------
@@ -224,40 +228,37 @@ class CommandProcessor(object):
 
             try:
 
-                handler                  = self.__cmdline_handlers[best_fit_index][0]  # function
-                expected_named_arguments = self.__cmdline_handlers[best_fit_index][2]  # list
+                handler                          = self.__cmdline_handlers[best_fit_index][0]  # function
+                expected_named_arguments         = self.__cmdline_handlers[best_fit_index][2]  # list
+                expected_named_arguments_by_name = self.__cmdline_handlers[best_fit_index][3]  # dict
 
                 # check whether all specified named arguments are expected and within bounds
                 # -------------------------------------------------------------------------------------------------------------------------
-                not_specified_named_arguments = expected_named_arguments[:]
+                not_specified_named_arguments = dict(expected_named_arguments_by_name)
                 for arg_name, arg_values in specified_named_arguments.items():
 
                     # find definition of the named argument
-                    arg_def = None
-                    for x in expected_named_arguments:
-                        if arg_name.lower() == x.name:
-                            arg_def = x
-                            if arg_def in not_specified_named_arguments:
-                                not_specified_named_arguments.remove(arg_def)
-                            break
+                    arg_def = expected_named_arguments_by_name.get(arg_name)
+                    if arg_def != None:
+                        not_specified_named_arguments.pop(arg_def._name_lower, None)
 
                     # abort, if the argument does not have a definition (=> argument is not allowed)
                     if arg_def == None:
                         error = "The named argument '--{0}' is not allowed in conjunction with the specified positional arguments.".format(arg_name)
                         Log.write_error(error)
-                        if not Log.uses_stdio: print_error(error)
+                        if not uses_stdio: print_error(error)
                         return EXIT_CODE_COMMAND_LINE_ARGUMENT_ERROR
 
                     if len(arg_values) < arg_def.min_occurrence:
                         error = "The named argument '--{0}' is required at least {1} times.".format(arg_name, arg_def.min_occurrence)
                         Log.write_error(error)
-                        if not Log.uses_stdio: print_error(error)
+                        if not uses_stdio: print_error(error)
                         return EXIT_CODE_COMMAND_LINE_ARGUMENT_ERROR
 
                     if len(arg_values) > arg_def.max_occurrence:
                         error = "The named argument '--{0}' is allowed at maximum {1} times.".format(arg_name, arg_def.max_occurrence)
                         Log.write_error(error)
-                        if not Log.uses_stdio: print_error(error)
+                        if not uses_stdio: print_error(error)
                         return EXIT_CODE_COMMAND_LINE_ARGUMENT_ERROR
 
                 # craft the effective named arguments
@@ -275,18 +276,16 @@ class CommandProcessor(object):
                          arg_value_from_stdin = readline_if_no_tty()
                          if arg_value_from_stdin != None:
                              Log.write_debug("=> Reading from stdin returned '{0}'.", arg_value_from_stdin)
-                             if arg_def in not_specified_named_arguments:
-                                 not_specified_named_arguments.remove(arg_def)
-                         elif sys.stdin.isatty():
+                             not_specified_named_arguments.pop(arg_def._name_lower, None)
+                         elif is_stdin_tty():
                              Log.write_debug("=> Reading from stdin does not work, running in terminal mode.")
-                             if arg_def in not_specified_named_arguments:
-                                 not_specified_named_arguments.remove(arg_def)
+                             not_specified_named_arguments.pop(arg_def._name_lower, None)
                          else:
                              Log.write_debug("=> Reading from stdin failed. Not enough data piped in?")
 
                     # read values of named arguments
-                    if arg_def.name in specified_named_arguments:
-                        arg_values = specified_named_arguments[arg_def.name]
+                    if arg_def._name_lower in specified_named_arguments:
+                        arg_values = specified_named_arguments[arg_def._name_lower]
                         for arg_value in arg_values:
                             Log.write_debug("=> Reading from command line returned '{0}'.", arg_value)
                             effective_argument_values.append(arg_value)
@@ -300,11 +299,11 @@ class CommandProcessor(object):
 
                 # check whether required named arguments have been specified
                 # -------------------------------------------------------------------------------------------------------------------------
-                for arg_def in not_specified_named_arguments:
+                for arg_def in not_specified_named_arguments.values():
                     if arg_def.min_occurrence > 0:
                         error = "The named argument '--{0}' must be specified. ".format(arg_def.name)
                         Log.write_error(error)
-                        if not Log.uses_stdio: print_error(error)
+                        if not uses_stdio: print_error(error)
                         return EXIT_CODE_COMMAND_LINE_ARGUMENT_ERROR
 
                 # invoke handler
@@ -315,10 +314,14 @@ class CommandProcessor(object):
 
             except Exception as e:
 
-                # try to call registered exception handler
-                for exception_handler in self.__exception_handlers:
-                    if exception_handler[1] == type(e):
-                        return exception_handler[0](e)
+                # try to call registered exception handler (the handler registered for the most derived type wins,
+                # handlers for base types of ExitCodeError do not catch exceptions deriving from ExitCodeError)
+                for exception_type in type(e).__mro__:
+                    exception_handler = self.__exception_handlers.get(exception_type)
+                    if exception_handler != None:
+                        return exception_handler(e)
+                    if exception_type is ExitCodeError:
+                        break
 
                 # handle exceptions that are associated with exit codes
                 if isinstance(e, ExitCodeError):
@@ -10,7 +10,8 @@ EXIT_CODE_GENERAL_ERROR                = 1
 EXIT_CODE_COMMAND_LINE_ARGUMENT_ERROR  = 2
 EXIT_CODE_FILE_NOT_FOUND               = 3
 EXIT_CODE_IO_ERROR                     = 4
-EXIT_CODE_CONFIGURATION_EROR           = 5
+EXIT_CODE_CONFIGURATION_ERROR          = 5
+EXIT_CODE_CONFIGURATION_EROR           = EXIT_CODE_CONFIGURATION_ERROR # misspelled name, kept for compatibility
 
 
 # -----------------------------------------------------------------------------------------------------------------------------------------
@@ -31,7 +32,32 @@ class ExitCodeError(Exception):
 
     def __init__(self, exitcode, message, *args):
         self.exitcode = exitcode
-        self.message = message.format(*args)
+        self._template = message
+        self._args = args
+        self._message = None
+
+    @property
+    def message(self):
+        """
+        Gets the explanation of the error (the message is formatted on first access only). If the arguments do not
+        match the placeholders in the message, the raw message followed by the arguments is returned, so reporting the
+        error does not fail.
+
+        """
+        if self._message is None:
+            try:
+                self._message = self._template.format(*self._args)
+            except (IndexError, KeyError, ValueError):
+                self._message = "{0} {1}".format(self._template, repr(self._args))
+        return self._message
+
+    @message.setter
+    def message(self, value):
+        """
+        Sets the explanation of the error.
+
+        """
+        self._message = value
 
 
 # -----------------------------------------------------------------------------------------------------------------------------------------
@@ -5,17 +5,37 @@ License: MIT License
 """
 
 import chardet
+import codecs
+import concurrent.futures
 import dns.resolver
 import dns.rdtypes
+import functools
+import io
 import os
-import platform
 import re
+import secrets
 import shutil
 import subprocess
 import sys
 
+from .gp_errors import ConfigurationError
 from .gp_log import Log
 
+# size of the buffer used when writing text files (larger than the default to reduce the number of write calls)
+_WRITE_BUFFER_SIZE = 131072
+
+# byte order marks and the encodings they indicate (UTF-32 must be checked before UTF-16, since the BOMs overlap)
+_BYTE_ORDER_MARKS = (
+    (codecs.BOM_UTF8,     'utf-8-sig'),
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+# simple format of an e-mail address (see is_email_address())
+_EMAIL_ADDRESS_REGEX = re.compile(r"^.+@[^@]+\.[^@]+$")
+
 
 ###################################################################################################################################################################################
 # console helpers
@@ -33,6 +53,18 @@ def print_error(message, *args):
     print("ERROR: " + message.format(*args), file=sys.stderr)
 
 
+@functools.lru_cache(maxsize=None)
+def is_stdin_tty():
+    """
+    Checks whether stdin is attached to a terminal (checked once, stdin does not change while the script is running).
+
+    Returns:
+        True, if stdin is attached to a terminal;
+        otherwise False.
+    """
+    return sys.stdin.isatty()
+
+
 def readline_if_no_tty():
     """
     Reads a line from stdin, if the container is running without an attached pseudo TTY.
@@ -41,7 +73,7 @@ def readline_if_no_tty():
         The line read from stdin (excl. the newline character);
         None, if a preudo TTY is attached to the container or stdin is at EOF.
     """
-    if not sys.stdin.isatty():
+    if not is_stdin_tty():
         line = sys.stdin.readline()
         if len(line) > 0:
             return line.rstrip()
@@ -53,6 +85,53 @@ def readline_if_no_tty():
 ###################################################################################################################################################################################
 
 
+def _detect_bom_encoding(data):
+    """
+    Determines the encoding of text from its byte order mark (BOM).
+
+    Args:
+        data (bytes) : Text to check.
+
+    Returns:
+        The encoding indicated by the byte order mark (decoding with it strips the byte order mark);
+        None, if the text does not start with a byte order mark.
+
+    """
+    for bom, encoding in _BYTE_ORDER_MARKS:
+        if data.startswith(bom):
+            return encoding
+    return None
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+
+
+def _detect_encoding(data, chunk_size = 512):
+    """
+    Detects the encoding of text feeding it chunk by chunk into the encoding detector (stops as soon as the detector
+    is confident).
+
+    Args:
+        data (bytes)               : Text to detect the encoding of.
+        chunk_size (int, optional) : Number of bytes to feed into the detector at once.
+
+    Returns:
+        The detected encoding;
+        None, if the encoding could not be detected.
+
+    """
+    detector = chardet.UniversalDetector()
+    for offset in range(0, len(data), chunk_size):
+        detector.feed(data[offset:offset + chunk_size])
+        if detector.done:
+            break
+    detector.close()
+    return detector.result['encoding']
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+
+
 def read_text_file(filename, encoding = None):
     """
     Reads a text file (detects the encoding automatically).
@@ -65,13 +144,13 @@ def read_text_file(filename, encoding = None):
         The content of the specified file as a string.
 
     """
-    with open(filename, 'rb') as file:
-        if not encoding:
-            raw = file.read(32)
-            encoding = chardet.detect(raw)['encoding']
-        with open(filename, encoding=encoding) as file:
-            text = file.read()
-        return text, encoding
+    with open(filename, 'rb', buffering=0) as file:
+        data = file.read()
+    if not encoding:
+        encoding = _detect_bom_encoding(data) or _detect_encoding(data[:4096])
+    # decode in memory (the text wrapper translates newlines just as reading the file in text mode would)
+    text = io.TextIOWrapper(io.BytesIO(data), encoding=encoding).read()
+    return text, encoding
 
 
 # ---------------------------------------------------------------------------------------------------------------------
@@ -87,7 +166,7 @@ def write_text_file(filename, encoding, text):
         text (str)     : Text to write into the file.
 
     """
-    with open(filename, 'w', encoding=encoding) as file:
+    with open(filename, 'w', encoding=encoding, buffering=_WRITE_BUFFER_SIZE) as file:
         file.write(text)
 
 
@@ -102,8 +181,11 @@ def touch_file(path):
         path (str) : Path of the file to touch.
 
     """
-    with open(path, 'a'):
+    try:
         os.utime(path, None)
+    except FileNotFoundError:
+        # the file does not exist, yet => create it (sets the current time as well)
+        os.close(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_CLOEXEC, 0o666))
 
 
 # ---------------------------------------------------------------------------------------------------------------------
@@ -119,37 +201,9 @@ def copy_directory(src_path, dest_path):
 
     """
 
+    # let 'cp' copy the tree (copies ownership, permissions, timestamps and symbolic links as well)
     os.mkdir(dest_path)
-
-    for subdir, dirs, files in os.walk(src_path):
-
-        relative_subdir = os.path.relpath(subdir, src_path)
-
-        # adjust owner/group and stats of the current subdir
-        if platform.system() == 'Linux':
-            built_src_path = os.path.normpath(os.path.join(src_path, relative_subdir))
-            built_dest_path = os.path.normpath(os.path.join(dest_path, relative_subdir))
-            shutil.copystat(src_path, dest_path)
-            src_stat = os.stat(built_src_path)
-            os.chown(built_dest_path, src_stat.st_uid, src_stat.st_gid)
-
-        for filename in files:
-            built_src_path = os.path.normpath(os.path.join(src_path, relative_subdir, filename))
-            built_dest_path = os.path.normpath(os.path.join(dest_path, relative_subdir, filename))
-            shutil.copy(built_src_path, built_dest_path)
-            if platform.system() == 'Linux':
-                shutil.copystat(built_src_path, built_dest_path)
-                src_stat = os.stat(built_src_path)
-                os.chown(built_dest_path, src_stat.st_uid, src_stat.st_gid)
-
-        for dirname in dirs:
-            built_src_path = os.path.normpath(os.path.join(src_path, relative_subdir, dirname))
-            built_dest_path = os.path.normpath(os.path.join(dest_path, relative_subdir, dirname))
-            os.mkdir(built_dest_path)
-            if platform.system() == 'Linux':
-                shutil.copystat(built_src_path, built_dest_path)
-                src_stat = os.stat(built_src_path)
-                os.chown(built_dest_path, src_stat.st_uid, src_stat.st_gid)
+    subprocess.run(["cp", "-a", "--", os.path.join(src_path, "."), dest_path], check=True)
 
 
 # ---------------------------------------------------------------------------------------------------------------------
@@ -164,22 +218,9 @@ def remove_tree(path):
 
     """
 
+    # symbolic links to directories within the tree are removed, not descended into
     if os.path.isdir(path):
-        files_to_remove = []
-        files_to_remove.append((path, os.rmdir))
-        for subdir, dirs, files in os.walk(path):
-            for filename in files:
-                file_path = os.path.join(subdir, filename)
-                files_to_remove.append((file_path, os.remove))
-            for dirname in dirs:
-                dir_path = os.path.join(subdir, dirname)
-                if os.path.islink(dir_path):
-                    files_to_remove.append((dir_path, os.remove))
-                else:
-                    files_to_remove.append((dir_path, os.rmdir))
-        files_to_remove.sort(key=lambda x: x[0], reverse=True)
-        for file_path, remove_func in files_to_remove:
-            remove_func(file_path)
+        shutil.rmtree(path)
 
 
 ###################################################################################################################################################################################
@@ -187,6 +228,42 @@ def remove_tree(path):
 ###################################################################################################################################################################################
 
 
+@functools.lru_cache(maxsize=None)
+def _php_define_regex(define):
+    """
+    Gets the compiled regular expression matching the definition of the specified named constant in PHP code.
+
+    Args:
+        define (str) : Name of the named constant.
+
+    Returns:
+        The compiled regular expression (cached per name).
+
+    """
+    return re.compile(r'^(\s*define\s*\(\s*\'{0}\'\s*,\s*).*(\s*\)\s*;.*)'.format(re.escape(define)), re.MULTILINE | re.UNICODE)
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+
+
+@functools.lru_cache(maxsize=None)
+def _php_variable_regex(variable):
+    """
+    Gets the compiled regular expression matching the assignment of the specified variable in PHP code.
+
+    Args:
+        variable (str) : Name of the PHP variable.
+
+    Returns:
+        The compiled regular expression (cached per name).
+
+    """
+    return re.compile(r'^(\s*\${0}\s*=\s*).*(;.*)'.format(re.escape(variable)), re.MULTILINE | re.UNICODE)
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+
+
 def replace_php_define(text, define, value):
     """
     Replaces a named constaint (define) in PHP code.
@@ -200,11 +277,10 @@ def replace_php_define(text, define, value):
         The modified PHP code.
 
     """
-    if isinstance(value, str): replacement = '\g<1>\'{0}\'\g<2>'.format(value)
-    elif isinstance(value,int): replacement = '\g<1>{0}\g<2>'.format(value)
+    if isinstance(value, str): replacement = r"\g<1>'{0}'\g<2>".format(value)
+    elif isinstance(value,int): replacement = r'\g<1>{0}\g<2>'.format(value)
     else: raise RuntimeError('Datatype is not supported.')
-    regex = '^(\s*define\s*\(\s*\'{0}\'\s*,\s*).*(\s*\)\s*;.*)'.format(re.escape(define))
-    text,substitutions = re.subn(regex, replacement, text, 1, re.MULTILINE | re.UNICODE)
+    text,substitutions = _php_define_regex(define).subn(replacement, text, 1)
     if substitutions == 0: raise RuntimeError('Named constant \'{0}\' is not part of the specified php code.'.format(define))
     return text
 
@@ -225,11 +301,10 @@ def replace_php_variable(text, variable, value):
         The modified PHP code.
 
     """
-    if isinstance(value, str): replacement = '\g<1>\'{0}\'\g<2>'.format(value)
-    elif isinstance(value,int): replacement = '\g<1>{0}\g<2>'.format(value)
+    if isinstance(value, str): replacement = r"\g<1>'{0}'\g<2>".format(value)
+    elif isinstance(value,int): replacement = r'\g<1>{0}\g<2>'.format(value)
     else: raise RuntimeError('Datatype is not supported.')
-    regex = '^(\s*\${0}\s*=\s*).*(;.*)'.format(re.escape(variable))
-    text,substitutions = re.subn(regex, replacement, text, 1, re.MULTILINE | re.UNICODE)
+    text,substitutions = _php_variable_regex(variable).subn(replacement, text, 1)
     if substitutions == 0: raise RuntimeError('Variable \'${0}\' is not part of the specified php code.'.format(variable))
     return text
 
@@ -239,6 +314,27 @@ def replace_php_variable(text, variable, value):
 ###################################################################################################################################################################################
 
 
+@functools.lru_cache(maxsize=None)
+def _password_translation_table(chars):
+    """
+    Builds the table mapping random bytes (decoded as latin-1) to chars of the specified alphabet.
+    Bytes beyond the largest multiple of the alphabet length are mapped to None, so str.translate() drops them and
+    every char of the alphabet is equally likely.
+
+    Args:
+        chars (str) : String containing chars allowed in the generated password (at most 256 chars).
+
+    Returns:
+        The translation table (cached per alphabet).
+
+    """
+    limit = 256 - 256 % len(chars)
+    return { i : chars[i % len(chars)] if i < limit else None for i in range(256) }
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+
+
 def generate_password(length, chars = "abcdefghijklmnopqrstuvwxyzABCDEFGHJKLMNPQRSTUVWXYZ0123456789+-*/!ยง$%&#;:,.~^<>{}[]()"):
     """
     Generated a random password of the specified length.
@@ -253,7 +349,17 @@ def generate_password(length, chars = "abcdefghijklmnopqrstuvwxyzABCDEFGHJKLMNPQ
     """
     if not isinstance(length, int) or length < 1:
         raise ValueError("length must have positive length")
-    return "".join(chars[int(c) % len(chars)] for c in os.urandom(length))
+
+    # alphabets with more chars than a byte can select from are sampled char by char
+    if len(chars) > 256:
+        return "".join([secrets.choice(chars) for _ in range(length)])
+
+    # map random bytes to chars in a single translate() call (bytes the table drops are rejected to avoid modulo bias)
+    table = _password_translation_table(chars)
+    password = ""
+    while len(password) < length:
+        password += os.urandom(length - len(password) + 16).decode('latin-1').translate(table)
+    return password[:length]
 
 
 ###################################################################################################################################################################################
@@ -281,19 +387,19 @@ def get_env_setting_bool(var_name, default_value = None):
     value = os.environ.get(var_name)
     if value:
         if value == '0' or value.lower() == 'false':
-            Log.write_info('Environment variable \'{0}\' is set to \'false\'.'.format(var_name))
+            Log.write_info('Environment variable \'{0}\' is set to \'false\'.', var_name)
             return False
         elif value == '1' or value.lower() == 'true':
-            Log.write_info('Environment variable \'{0}\' is set to \'true\'.'.format(var_name))
+            Log.write_info('Environment variable \'{0}\' is set to \'true\'.', var_name)
             return True
         else:
             error = 'Environment variable {0} does not specify a boolean value ({1}).'.format(var_name, value)
             raise ConfigurationError(error)
     else:
         if default_value != None:
-            Log.write_info('Environment variable \'{0}\' is not set... Using \'{1}\' instead.'.format(var_name, default_value))
+            Log.write_info('Environment variable \'{0}\' is not set... Using \'{1}\' instead.', var_name, default_value)
         else:
-            Log.write_info('Environment variable \'{0}\' is not set...'.format(var_name))
+            Log.write_info('Environment variable \'{0}\' is not set...', var_name)
         return default_value
 
 
@@ -318,34 +424,32 @@ def get_env_setting_integer(var_name, default_value = None, min = None, max = No
 
     """
     value = os.environ.get(var_name)
-    if value:
-
-        try:
-            value = int(value, 10)
-        except exception:
-            error = 'Environment variable\'{0}\' does not specify a valid integer ({1}).'.format(var_name, value)
-            raise ConfigurationError(error)
-
-        Log.write_info('Environment variable \'{0}\' is set to \'{1}\'.'.format(var_name, value))
 
-        if min and value < min: 
-            error = 'Environment variable\'{0}\' is less than the lower bound ({1}). Ignoring setting...'.format(var_name, min)
-            raise ConfigurationError(error)
+    # fast path: variable is not set
+    if not value:
+        if default_value != None:
+            Log.write_info('Environment variable \'{0}\' is not set... Using \'{1}\' instead.', var_name, default_value)
+        else:
+            Log.write_info('Environment variable \'{0}\' is not set...', var_name)
+        return default_value
 
-        if max and value > max: 
-            error = 'Environment variable\'{0}\' is greater than the upper bound ({1}). Ignoring setting...'.format(var_name, max)
-            raise ConfigurationError(error)
+    try:
+        value = int(value, 10)
+    except ValueError:
+        error = 'Environment variable\'{0}\' does not specify a valid integer ({1}).'.format(var_name, value)
+        raise ConfigurationError(error)
 
-        return value
+    Log.write_info('Environment variable \'{0}\' is set to \'{1}\'.', var_name, value)
 
-    else:
+    if min is not None and value < min:
+        error = 'Environment variable\'{0}\' is less than the lower bound ({1}). Ignoring setting...'.format(var_name, min)
+        raise ConfigurationError(error)
 
-        if default_value != None:
-            Log.write_info('Environment variable \'{0}\' is not set... Using \'{1}\' instead.'.format(var_name, default_value))
-        else:
-            Log.write_info('Environment variable \'{0}\' is not set...'.format(var_name))
+    if max is not None and value > max:
+        error = 'Environment variable\'{0}\' is greater than the upper bound ({1}). Ignoring setting...'.format(var_name, max)
+        raise ConfigurationError(error)
 
-        return default_value
+    return value
 
 
 # ---------------------------------------------------------------------------------------------------------------------
@@ -368,13 +472,13 @@ def get_env_setting_string(var_name, default_value = None):
     """
     value = os.environ.get(var_name)
     if value:
-        Log.write_info('Environment variable \'{0}\' is set to \'{1}\'.'.format(var_name, value))
+        Log.write_info('Environment variable \'{0}\' is set to \'{1}\'.', var_name, value)
         return value
     else:
         if default_value != None:
-            Log.write_info('Environment variable \'{0}\' is not set... Using \'{1}\' instead.'.format(var_name, default_value))
+            Log.write_info('Environment variable \'{0}\' is not set... Using \'{1}\' instead.', var_name, default_value)
         else:
-            Log.write_info('Environment variable \'{0}\' is not set...'.format(var_name))
+            Log.write_info('Environment variable \'{0}\' is not set...', var_name)
         return default_value
 
 
@@ -394,14 +498,22 @@ def is_kernel_module_loaded(module_name):
         True, if the module is loaded; otherwise False.
 
     """
-    with open("/proc/modules") as file:
-        lines = file.readlines()
-    lines = [x.strip() for x in lines]
-    for line in lines:
-        other_module_name = line.split(" ")[0]
-        if (other_module_name == module_name):
-            return True
-    return False
+    return module_name in get_loaded_kernel_modules()
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+
+
+def get_loaded_kernel_modules():
+    """
+    Gets the names of all loaded kernel modules.
+
+    Returns:
+        A set containing the names of the loaded kernel modules.
+
+    """
+    with open("/proc/modules", buffering=65536) as file:
+        return { line.split(" ", 1)[0] for line in file }
 
 
 # ---------------------------------------------------------------------------------------------------------------------
@@ -415,22 +527,45 @@ def load_kernel_module(module_name):
         module_name (str) : Name of the module to load.
 
     """
-    if is_kernel_module_loaded(module_name):
-        Log.write_info("Loading kernel module '{0}' not necessary, it is already loaded.".format(module_name))
+    load_kernel_modules([module_name])
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+
+
+def load_kernel_modules(module_names):
+    """
+    Loads the kernel modules with the specified names (modules that are not loaded yet are loaded by a single call to
+    'modprobe').
+
+    Args:
+        module_names (list of str) : Names of the modules to load.
+
+    """
+    loaded_modules = get_loaded_kernel_modules()
+    modules_to_load = []
+    for module_name in module_names:
+        if module_name in loaded_modules:
+            Log.write_info("Loading kernel module '{0}' not necessary, it is already loaded.", module_name)
+        elif module_name not in modules_to_load:
+            modules_to_load.append(module_name)
+
+    if not modules_to_load:
         return
 
-    # try to load the module
+    # try to load the modules
+    modules = ", ".join(modules_to_load)
     try:
-        process = subprocess.run(["modprobe", module_name], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        process = subprocess.run(["modprobe", "-a", *modules_to_load], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
     except FileNotFoundError:
-        Log.write_error("Loading module '{0}' failed ('modprobe' is not installed).".format(module_name))
+        Log.write_error("Loading module '{0}' failed ('modprobe' is not installed).", modules)
         raise
 
     # evaluate modprobe's exit code
     if process.returncode == 0:
-        Log.write_info("Loading module '{0}' succeeded.".format(module_name))
+        Log.write_info("Loading module '{0}' succeeded.", modules)
     else:
-        Log.write_error("Loading module '{0}' failed, modprobe returned with code {1}.".format(module_name, process.returncode))
+        Log.write_error("Loading module '{0}' failed, modprobe returned with code {1}.", modules, process.returncode)
         Log.write_error("The host's module directory must be linked into the container and the container must run in privileged mode to load modules.")
         raise RuntimeError()
 
@@ -451,7 +586,44 @@ def is_email_address(s):
         otherwise False.
 
     """
-    return re.match(r"^.+@[^@]+\.[^@]+$", s)
+    return _EMAIL_ADDRESS_REGEX.match(s) is not None
+
+
+@functools.lru_cache(maxsize=None)
+def _get_resolver():
+    """
+    Gets the DNS resolver shared by all lookups (created on first use, so /etc/resolv.conf is only read when needed).
+
+    Returns:
+        The DNS resolver.
+
+    """
+    resolver = dns.resolver.Resolver()
+    resolver.cache = dns.resolver.Cache()
+    return resolver
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+
+
+@functools.lru_cache(maxsize=None)
+def _resolve(hostname, rdtype):
+    """
+    Querys the DNS for records of the specified type (results are cached, so repeated lookups do not hit the network).
+
+    Args:
+        hostname (str)         : hostname to resolve.
+        rdtype (dns.rdatatype) : type of the records to query (A or AAAA).
+
+    Returns:
+        A tuple containing the addresses in the returned records (empty, if the DNS did not return any records).
+
+    """
+    answer = _get_resolver().resolve(hostname, rdtype, dns.rdataclass.IN, search=True, raise_on_no_answer=False)
+    return tuple(record.address for record in answer)
+
+
+# ---------------------------------------------------------------------------------------------------------------------
 
 
 def resolve_hostname(hostname):
@@ -467,20 +639,8 @@ def resolve_hostname(hostname):
 
     """
 
-    ipv4_addresses = []
-    try:
-        for record in dns.resolver.query(hostname, dns.rdatatype.A, dns.rdataclass.IN):
-            ipv4_addresses.append(record.address)
-    except dns.resolver.NoAnswer:
-        pass
-
-    ipv6_addresses = []
-    try:
-        for record in dns.resolver.query(hostname, dns.rdatatype.AAAA, dns.rdataclass.IN):
-            ipv6_addresses.append(record.address)
-    except dns.resolver.NoAnswer:
-        pass
-
+    ipv4_addresses = list(_resolve(hostname, dns.rdatatype.A))
+    ipv6_addresses = list(_resolve(hostname, dns.rdatatype.AAAA))
     return (ipv4_addresses, ipv6_addresses)
 
 
@@ -489,6 +649,7 @@ def resolve_hostname(hostname):
 
 def resolve_hostnames(hostnames):
     """Querys the DNS and returns IPv4 and IPv6 addresses of the specified hostnames (querys A and AAAA records only).
+    The queries are run in parallel, so resolving multiple hostnames takes about as long as resolving a single one.
 
     Args:
         hostnames (list of str) : hostnames to resolve.
@@ -499,8 +660,19 @@ def resolve_hostnames(hostnames):
         Example: { "myhost.mydomain.com" : ( [ 192.168.0.1, 10.0.0.1 ], [ fd00:dead:beef::1, fd00:dead:beef::2 ] ) }
 
     """
-    
-    return { hostname : resolve_hostname(hostname) for hostname in hostnames }
+
+    hostnames = list(dict.fromkeys(hostnames))
+    if not hostnames:
+        return {}
+
+    # fan out the A and AAAA queries of all hostnames at once
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(16, 2 * len(hostnames))) as executor:
+        futures = { hostname : (executor.submit(_resolve, hostname, dns.rdatatype.A),
+                                executor.submit(_resolve, hostname, dns.rdatatype.AAAA))
+                    for hostname in hostnames }
+
+    return { hostname : (list(ipv4_future.result()), list(ipv6_future.result()))
+             for hostname, (ipv4_future, ipv6_future) in futures.items() }
 
 
 ###################################################################################################################################################################################
@@ -508,6 +680,39 @@ def resolve_hostnames(hostnames):
 ###################################################################################################################################################################################
 
 
+@functools.lru_cache(maxsize=None)
+def _load_mounts():
+    """
+    Parses /proc/mounts (cached, see invalidate_mount_cache()).
+
+    Returns:
+        A dictionary mapping mount points to the set of their mount flags
+        (the first entry wins, if a mount point is listed multiple times).
+
+    """
+    mounts = {}
+    with open("/proc/mounts", buffering=65536) as f:
+        for line in f:
+            device, mount_point, filesystem, flags, __, __ = line.split()
+            mounts.setdefault(mount_point, frozenset(flags.split(",")))
+    return mounts
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+
+
+def invalidate_mount_cache():
+    """
+    Discards the cached content of /proc/mounts, so the mount helpers see changes made since they were last called.
+    Must be called after mounting, unmounting or remounting file systems.
+
+    """
+    _load_mounts.cache_clear()
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+
+
 def does_mount_point_exist(mnt):
     """
     Checks whether the specified point moint exists.
@@ -520,13 +725,7 @@ def does_mount_point_exist(mnt):
         otherwise False
 
     """
-    with open("/proc/mounts") as f:
-        for line in f:
-            device, mount_point, filesystem, flags, __, __ = line.split()
-            flags = flags.split(",")
-            if mount_point == mnt:
-                return True
-        return False
+    return mnt in _load_mounts()
 
 
 # ---------------------------------------------------------------------------------------------------------------------
@@ -547,13 +746,10 @@ def is_mount_point_readonly(mnt):
         ValueError : The specified mount point doesn't exist.
 
     """
-    with open("/proc/mounts") as f:
-        for line in f:
-            device, mount_point, filesystem, flags, __, __ = line.split()
-            flags = flags.split(",")
-            if mount_point == mnt:
-                return 'ro' in flags
+    flags = _load_mounts().get(mnt)
+    if flags == None:
         raise ValueError("Mount point {0} doesn't exist".format(mnt))
+    return 'ro' in flags
 
 
 ###################################################################################################################################################################################
@@ -561,42 +757,180 @@ def is_mount_point_readonly(mnt):
 ###################################################################################################################################################################################
 
 
-def iptables_run(args, comment=None):
-    """Calls 'iptables' with the specified arguments.
+# rules queued for 'iptables-restore' and 'ip6tables-restore' (table => [ chain declarations, rules ])
+_iptables_rules = {}
+_ip6tables_rules = {}
+
+# commands of 'iptables' and 'ip6tables' that can be queued for 'iptables-restore' and 'ip6tables-restore'
+_IPTABLES_QUEUEABLE_COMMANDS = frozenset(("-A", "--append", "-N", "--new-chain"))
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+
+
+def _quote_iptables_arg(arg):
+    """
+    Quotes an argument for use in the input of 'iptables-restore', if necessary.
 
     Args:
-        args (list of str)      : Arguments to pass to 'iptables'.
+        arg (str) : Argument to quote.
+
+    Returns:
+        The argument, enclosed in double quotes, if it contains whitespaces or double quotes.
+
+    """
+    if arg and not any(c.isspace() or c == '"' for c in arg):
+        return arg
+    return '"{0}"'.format(arg.replace('\\', '\\\\').replace('"', '\\"'))
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+
+
+def _get_iptables_command(args):
+    """
+    Gets the command in the specified arguments for 'iptables' or 'ip6tables' (the table option is skipped).
+
+    Args:
+        args (list of str) : Arguments as they would be passed to 'iptables' or 'ip6tables'.
+
+    Returns:
+        The command (e.g. '-A' or '-N');
+        None, if the arguments do not contain a command.
+
+    """
+    index = 0
+    while index < len(args) and args[index] in ("-t", "--table"):
+        index += 2
+    return args[index] if index < len(args) else None
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+
+
+def _run_iptables(rules, command, args, comment):
+    """
+    Queues a call to 'iptables' or 'ip6tables' for 'iptables-restore' or 'ip6tables-restore', if it appends a rule or
+    creates a chain. Any other command is run immediately after applying the queued rules, so the order is retained.
+
+    Args:
+        rules (dict)            : Queued rules (see _iptables_rules and _ip6tables_rules).
+        command (str)           : Command to run ('iptables' or 'ip6tables').
+        args (list of str)      : Arguments to pass to the command.
         comment (str, optional) : Comment to attach to the rule.
 
     """
-    run_args = ["iptables", *args]
+    if _get_iptables_command(args) in _IPTABLES_QUEUEABLE_COMMANDS:
+        _queue_iptables_rule(rules, command, args, comment)
+        return
+
+    _restore_iptables_rules(command + "-restore", rules)
+    run_args = [command, *args]
     if comment: run_args.extend(["-m", "comment", "--comment", comment])
-    Log.write_debug("Running: {0}".format(" ".join(run_args)))
+    Log.write_debug("Running: {0}", " ".join(run_args))
     subprocess.run(run_args, check=True, stdout=subprocess.DEVNULL)
 
 
 # ---------------------------------------------------------------------------------------------------------------------
 
 
+def _queue_iptables_rule(rules, command, args, comment):
+    """
+    Queues a rule for 'iptables-restore' or 'ip6tables-restore'.
+
+    Args:
+        rules (dict)            : Rules to add the rule to (see _iptables_rules and _ip6tables_rules).
+        command (str)           : Name of the command the arguments were meant for (for logging purposes only).
+        args (list of str)      : Arguments as they would be passed to 'iptables' or 'ip6tables'.
+        comment (str, optional) : Comment to attach to the rule.
+
+    """
+
+    args = list(args)
+    if comment: args.extend(["-m", "comment", "--comment", comment])
+    Log.write_debug_lazy(lambda: "Queueing: {0} {1}".format(command, " ".join(args)))
+
+    # the table is selected by the section the rule is put into
+    table = "filter"
+    for option in ("-t", "--table"):
+        if option in args:
+            index = args.index(option)
+            table = args[index + 1]
+            del args[index:index + 2]
+
+    chains, table_rules = rules.setdefault(table, ([], []))
+    if args[0] in ("-N", "--new-chain"):
+        chains.append(":{0} - [0:0]".format(args[1]))
+    elif args[0] in ("-A", "--append"):
+        table_rules.append(" ".join(_quote_iptables_arg(arg) for arg in args))
+    else:
+        raise ValueError("The command ({0}) cannot be queued, only appending rules and creating chains is supported.".format(args[0]))
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+
+
+def _restore_iptables_rules(command, rules):
+    """
+    Passes the queued rules to 'iptables-restore' or 'ip6tables-restore' (existing rules are kept).
+
+    Args:
+        command (str) : Command to run ('iptables-restore' or 'ip6tables-restore').
+        rules (dict)  : Queued rules (see _iptables_rules and _ip6tables_rules), cleared afterwards.
+
+    """
+
+    if not rules:
+        return
+
+    lines = []
+    for table, (chains, table_rules) in rules.items():
+        lines.append("*{0}".format(table))
+        lines.extend(chains)
+        lines.extend(table_rules)
+        lines.append("COMMIT")
+    rules.clear()
+
+    data = "\n".join(lines) + "\n"
+    Log.write_debug("Running: {0} --noflush\n{1}", command, data)
+    subprocess.run([command, "--noflush"], input=data, universal_newlines=True, check=True, stdout=subprocess.DEVNULL)
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+
+
+def iptables_run(args, comment=None):
+    """Calls 'iptables' with the specified arguments. Appending a rule ('-A') and creating a chain ('-N') are queued
+    (see iptables_commit()), other commands are run immediately after applying the queued rules.
+
+    Args:
+        args (list of str)      : Arguments to pass to 'iptables'.
+        comment (str, optional) : Comment to attach to the rule.
+
+    """
+    _run_iptables(_iptables_rules, "iptables", args, comment)
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+
+
 def ip6tables_run(args, comment=None):
-    """Calls 'ip6tables' with the specified arguments.
+    """Calls 'ip6tables' with the specified arguments. Appending a rule ('-A') and creating a chain ('-N') are queued
+    (see iptables_commit()), other commands are run immediately after applying the queued rules.
 
     Args:
         args (list of str)      : Arguments to pass to 'ip6tables'.
         comment (str, optional) : Comment to attach to the rule.
 
     """
-    run_args = ["ip6tables", *args]
-    if comment: run_args.extend(["-m", "comment", "--comment", comment])
-    Log.write_debug("Running: {0}".format(" ".join(run_args)))
-    subprocess.run(run_args, check=True, stdout=subprocess.DEVNULL)
+    _run_iptables(_ip6tables_rules, "ip6tables", args, comment)
 
 
 # ---------------------------------------------------------------------------------------------------------------------
 
 
 def iptables_add(table, target, args=[], comment=None):
-    """Adds a new netfilter rule to the specified table using the specified target and arguments.
+    """Queues a new netfilter rule for the specified table using the specified target and arguments (see iptables_commit()).
 
     Args:
         table (str)             : Table to add the rule to.
@@ -605,17 +939,14 @@ def iptables_add(table, target, args=[], comment=None):
         comment (str, optional) : Comment to attach to the rule.
 
     """
-    run_args = ["iptables", "-A", table, *args, "-j", target]
-    if comment: run_args.extend(["-m", "comment", "--comment", comment])
-    Log.write_debug("Running: {0}".format(" ".join(run_args)))
-    subprocess.run(run_args, check=True, stdout=subprocess.DEVNULL)
+    _queue_iptables_rule(_iptables_rules, "iptables", ["-A", table, *args, "-j", target], comment)
 
 
 # ---------------------------------------------------------------------------------------------------------------------
 
 
 def ip6tables_add(table, target, args=[], comment=None):
-    """Adds a new netfilter rule to the specified table using the specified target and arguments.
+    """Queues a new netfilter rule for the specified table using the specified target and arguments (see iptables_commit()).
 
     Args:
         table (str)             : Table to add the rule to.
@@ -624,8 +955,28 @@ def ip6tables_add(table, target, args=[], comment=None):
         comment (str, optional) : Comment to attach to the rule.
 
     """
-    run_args = ["ip6tables", "-A", table, *args, "-j", target]
-    if comment: run_args.extend(["-m", "comment", "--comment", comment])
-    Log.write_debug("Running: {0}".format(" ".join(run_args)))
-    subprocess.run(run_args, check=True, stdout=subprocess.DEVNULL)
+    _queue_iptables_rule(_ip6tables_rules, "ip6tables", ["-A", table, *args, "-j", target], comment)
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+
+
+def iptables_commit():
+    """Applies all queued IPv4 and IPv6 netfilter rules at once using 'iptables-restore' and 'ip6tables-restore'.
+
+    """
+    _restore_iptables_rules("iptables-restore", _iptables_rules)
+    _restore_iptables_rules("ip6tables-restore", _ip6tables_rules)
 
+
+# ---------------------------------------------------------------------------------------------------------------------
+
+
+def has_pending_iptables_rules():
+    """Checks whether netfilter rules have been queued, but not applied using iptables_commit().
+
+    Returns:
+        True, if there are queued rules; otherwise False.
+
+    """
+    return bool(_iptables_rules or _ip6tables_rules)
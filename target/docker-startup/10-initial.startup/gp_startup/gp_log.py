@@ -5,10 +5,11 @@ License: MIT License
 """
 
 import abc
-import datetime
+import atexit
 import os
 import socket
 import sys
+import time
 
 from syslog import syslog, openlog, closelog, \
                    LOG_EMERG, LOG_ALERT, LOG_CRIT, LOG_ERR, LOG_WARNING, LOG_NOTICE, LOG_INFO, LOG_DEBUG, \
@@ -17,6 +18,128 @@ from syslog import syslog, openlog, closelog, \
 
 from .gp_extensions import classproperty
 
+# severity levels of log messages (a message is logged, if its level does not exceed the verbosity of the logger)
+LEVEL_ERROR   = 1
+LEVEL_WARNING = 2
+LEVEL_NOTE    = 3
+LEVEL_INFO    = 4
+LEVEL_DEBUG   = 5
+
+# tags put between the timestamp and the text of a message
+_ERROR_PREFIX   = ' [error] '
+_WARNING_PREFIX = ' [warning] '
+_NOTE_PREFIX    = ' [note] '
+_INFO_PREFIX    = ' [info] '
+_DEBUG_PREFIX   = ' [debug] '
+
+# tags by severity level (as written by the StdioLogger through the text layer)
+_LEVEL_TEXT_PREFIXES = {
+    LEVEL_ERROR   : _ERROR_PREFIX,
+    LEVEL_WARNING : _WARNING_PREFIX,
+    LEVEL_NOTE    : _NOTE_PREFIX,
+    LEVEL_INFO    : _INFO_PREFIX,
+    LEVEL_DEBUG   : _DEBUG_PREFIX,
+}
+
+# tags by severity level encoded as ascii (as written by the StdioLogger to the binary buffer)
+_LEVEL_PREFIXES = {
+    LEVEL_ERROR   : _ERROR_PREFIX.encode("ascii"),
+    LEVEL_WARNING : _WARNING_PREFIX.encode("ascii"),
+    LEVEL_NOTE    : _NOTE_PREFIX.encode("ascii"),
+    LEVEL_INFO    : _INFO_PREFIX.encode("ascii"),
+    LEVEL_DEBUG   : _DEBUG_PREFIX.encode("ascii"),
+}
+
+# names of the writer methods by severity level
+_WRITER_NAMES = {
+    LEVEL_ERROR   : "write_error",
+    LEVEL_WARNING : "write_warning",
+    LEVEL_NOTE    : "write_note",
+    LEVEL_INFO    : "write_info",
+    LEVEL_DEBUG   : "write_debug",
+}
+
+# bits representing the severity levels in the mask of enabled levels of a logger
+MASK_ERROR    = 1 << (LEVEL_ERROR - 1)
+MASK_WARNING  = 1 << (LEVEL_WARNING - 1)
+MASK_NOTE     = 1 << (LEVEL_NOTE - 1)
+MASK_INFO     = 1 << (LEVEL_INFO - 1)
+MASK_DEBUG    = 1 << (LEVEL_DEBUG - 1)
+
+# writer installed on logger instances in place of the writer methods of disabled severity levels
+_NOOP = lambda *args, **kwargs: None
+
+# size of the buffer collecting messages written by the FileLogger (warnings and errors are flushed immediately)
+FILE_LOGGER_BUFFER_SIZE = 65536
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+
+
+# timestamp of the last log message (millisecond tick, formatted string and the string encoded as ascii)
+_last_timestamp_tick = None
+_last_timestamp = None
+_last_timestamp_bytes = None
+
+# date and time part of the timestamp of the last log message (second and formatted string)
+_last_timestamp_second = None
+_last_timestamp_second_str = None
+
+
+def _now_str():
+    """
+    Gets the current local time formatted for log messages (millisecond resolution).
+    Messages logged within the same millisecond share the formatted string, so it is built only once per tick. The date
+    and time part is formatted once per second using time.strftime(), the milliseconds are appended to it.
+
+    Returns:
+        The formatted timestamp (e.g. '2020-01-31 12:34:56.789').
+
+    """
+    global _last_timestamp_tick, _last_timestamp, _last_timestamp_bytes, _last_timestamp_second, _last_timestamp_second_str
+    tick = int(time.time() * 1000)
+    if tick != _last_timestamp_tick:
+        second, millisecond = divmod(tick, 1000)
+        if second != _last_timestamp_second:
+            _last_timestamp_second_str = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(second))
+            _last_timestamp_second = second
+        _last_timestamp = "{0}.{1:03d}".format(_last_timestamp_second_str, millisecond)
+        _last_timestamp_bytes = None
+        _last_timestamp_tick = tick
+    return _last_timestamp
+
+
+def _now_bytes():
+    """
+    Gets the current local time formatted for log messages (see _now_str()) encoded as ascii.
+
+    Returns:
+        The formatted timestamp (e.g. b'2020-01-31 12:34:56.789').
+
+    """
+    global _last_timestamp_bytes
+    timestamp = _now_str()
+    if _last_timestamp_bytes == None:
+        _last_timestamp_bytes = timestamp.encode("ascii")
+    return _last_timestamp_bytes
+
+
+def _fmt(text, args):
+    """
+    Formats the text of a log message. Text without arguments and without braces is returned as is, so the formatter
+    does not need to parse it. Text containing braces is always formatted, so escaped braces ('{{', '}}') are unescaped
+    even if no arguments are specified.
+
+    Args:
+        text (str)   : Text of the message (may contain placeholders).
+        args (tuple) : Arguments to use when formatting the text.
+
+    Returns:
+        The formatted text.
+
+    """
+    return text.format(*args) if args or '{' in text or '}' in text else text
+
 
 # ---------------------------------------------------------------------------------------------------------------------
 
@@ -29,12 +152,21 @@ class LoggerBase(object):
 
     __metaclass__ = abc.ABCMeta
 
-    _debug_level_enabled = False
-    _info_level_enabled = False
-    _note_level_enabled = False
-    _warning_level_enabled = False
-    _error_level_enabled = False
+    _enabled_mask = 0
+
+    # functions called when the enabled levels or the writer methods change (e.g. by combined loggers the logger
+    # belongs to and by the Log class, if the logger is its instance)
+    _observers = ()
 
+    # names of the writer methods and the severity levels of the messages they write
+    __writers = (
+        ("write_debug",      LEVEL_DEBUG),
+        ("write_info",       LEVEL_INFO),
+        ("write_note",       LEVEL_NOTE),
+        ("write_warning",    LEVEL_WARNING),
+        ("write_error",      LEVEL_ERROR),
+        ("write_debug_lazy", LEVEL_DEBUG),
+    )
 
     def __init__(self):
         """
@@ -109,6 +241,31 @@ class LoggerBase(object):
         raise NotImplementedError("The method is abstract.")
 
 
+    def _write_formatted(self, level, text):
+        """
+        Writes a message that has been formatted already (used by loggers passing a message to multiple loggers, so the
+        message is formatted only once). The caller must have checked that the level is enabled.
+
+        Args:
+            level (int) : Severity level of the message.
+            text (str)  : Formatted text to write to the log.
+
+        """
+        getattr(self, _WRITER_NAMES[level])(text)
+
+
+    def write_debug_lazy(self, func):
+        """
+        Writes a debug message to the log, building the message only, if debug messages are logged.
+        Use this method, if building the arguments of the message is expensive.
+
+        Args:
+            func (callable) : Function returning the text to write to the log (not formatted any further).
+
+        """
+        if self.is_enabled_for(LEVEL_DEBUG): self.write_debug("{0}", func())
+
+
     @property
     def uses_stdio(self):
         """
@@ -121,6 +278,22 @@ class LoggerBase(object):
         return False
 
 
+    def flush(self):
+        """
+        Writes buffered messages (the base implementation does nothing).
+
+        """
+        pass
+
+
+    def close(self):
+        """
+        Releases resources held by the logger (the base implementation does nothing).
+
+        """
+        pass
+
+
     def set_verbosity(self, level):
         """
         Sets the verbosity of startup system.
@@ -135,28 +308,196 @@ class LoggerBase(object):
                 5 = all messages (error, warning, note, info, debug)
 
         """
-        self._error_level_enabled = level > 0
-        self._warning_level_enabled = level > 1
-        self._note_level_enabled = level > 2
-        self._info_level_enabled = level > 3
-        self._debug_level_enabled = level > 4
+        self._enabled_mask = (1 << max(0, min(level, LEVEL_DEBUG))) - 1 # bits of all levels up to the specified one
+        self._specialize_writers()
+        self._notify_observers()
+
+
+    def _add_observer(self, observer):
+        """
+        Registers a function to call when the enabled levels or the writer methods of the logger change.
+
+        Args:
+            observer (callable) : Function to call (no arguments).
+
+        """
+        self._observers += (observer,)
+
+
+    def _remove_observer(self, observer):
+        """
+        Unregisters a function registered using _add_observer().
+
+        Args:
+            observer (callable) : Function to unregister.
+
+        """
+        self._observers = tuple(o for o in self._observers if o != observer)
+
+
+    def _notify_observers(self):
+        """
+        Calls the functions registered using _add_observer().
+
+        """
+        for observer in self._observers:
+            observer()
+
+
+    def _specialize_writers(self):
+        """
+        Replaces the writer methods of disabled severity levels with a no-op on the instance, so discarded messages do
+        not even reach the level check. Writer methods of enabled levels are reset to the methods of the class.
+        Called whenever the verbosity changes (derived classes may override it to install writers of their own).
+
+        """
+        for name, level in self.__writers:
+            if self.is_enabled_for(level):
+                self.__dict__.pop(name, None)
+            else:
+                setattr(self, name, _NOOP)
+
+
+    def is_enabled_for(self, level):
+        """
+        Checks whether messages of the specified severity level are logged (can be used to skip building expensive
+        arguments for messages that would be discarded anyway).
+
+        Args:
+            level (int) : Severity level to check (LEVEL_ERROR, LEVEL_WARNING, LEVEL_NOTE, LEVEL_INFO or LEVEL_DEBUG).
+
+        Returns:
+            True, if messages of the specified level are logged; otherwise False.
+
+        """
+        if level <= 0: return True
+        return bool(self._enabled_mask & (1 << (min(level, LEVEL_DEBUG) - 1)))
 
 
 # ---------------------------------------------------------------------------------------------------------------------
 
 
+class _StdioStream(object):
+    """
+    Writes messages to stdout/stderr. The stream is looked up on every message, so redirecting sys.stdout/sys.stderr
+    takes effect immediately. If the text layer of the stream passes all text on to its binary buffer immediately
+    (write-through), messages are written to the buffer directly, so they are encoded once and do not pass the text
+    layer. Otherwise messages are written through the text layer, so text written by other code (e.g. print()) and the
+    messages keep their order without flushing the stream for every message.
+
+    """
+
+    def __init__(self, name):
+        """
+        Initializes the object.
+
+        Args:
+            name (str) : Name of the stream in the sys module ('stdout' or 'stderr').
+
+        """
+        self.__name = name
+        self.__stream = None
+        self.__line = bytearray(256)
+
+
+    def __attach(self, stream):
+        """
+        Determines how to write to the specified stream (called whenever the stream in the sys module is replaced).
+
+        Args:
+            stream (TextIOWrapper) : The text stream to write to.
+
+        """
+        self.__stream = stream
+        buffer = getattr(stream, "buffer", None)
+        self.__buffer = buffer if getattr(stream, "write_through", False) else None
+        self.__encoding = getattr(stream, "encoding", None) or "utf-8"
+        self.__errors = getattr(stream, "errors", None) or "strict"
+
+        # messages are flushed immediately, if a terminal is attached (same as the line buffering of the text layer)
+        try:
+            self.__autoflush = stream.isatty()
+        except (AttributeError, ValueError):
+            self.__autoflush = False
+
+
+    def write(self, level, text, flush = False):
+        """
+        Writes a message to the stream.
+        Messages written to the binary buffer are assembled in a buffer that is reused for all messages, so only the
+        text needs to be encoded.
+
+        Args:
+            level (int)            : Severity level of the message (determines the tag put in front of the text).
+            text (str)             : Formatted text of the message.
+            flush (bool, optional) : True to flush the stream after writing the message; otherwise False.
+
+        """
+        stream = getattr(sys, self.__name)
+        if stream is not self.__stream: self.__attach(stream)
+
+        if self.__buffer == None:
+            stream.write(_now_str() + _LEVEL_TEXT_PREFIXES[level] + text + '\n')
+            if flush or self.__autoflush: stream.flush()
+            return
+
+        line = self.__line
+        del line[:]
+        line += _now_bytes()
+        line += _LEVEL_PREFIXES[level]
+        line += text.encode(self.__encoding, self.__errors)
+        line += b'\n'
+        self.__buffer.write(line)
+        if flush or self.__autoflush: self.__buffer.flush()
+
+
+    def flush(self):
+        """
+        Flushes the stream.
+
+        """
+        getattr(sys, self.__name).flush()
+
+
 class StdioLogger(LoggerBase):
     """
     A logger that writes messages to stdio/stderr.
 
     """
 
+    __stdout = None
+    __stderr = None
+
     def __init__(self):
         """
         Initializes the object.
 
         """
         super().__init__()
+        self.__stdout = _StdioStream("stdout")
+        self.__stderr = _StdioStream("stderr")
+
+
+    def flush(self):
+        """
+        Flushes stdout and stderr.
+
+        """
+        self.__stdout.flush()
+        self.__stderr.flush()
+
+
+    def _write_formatted(self, level, text):
+        """
+        Writes a message that has been formatted already (the caller must have checked that the level is enabled).
+
+        Args:
+            level (int) : Severity level of the message.
+            text (str)  : Formatted text to write to the log.
+
+        """
+        if level == LEVEL_ERROR: self.__stderr.write(level, text, flush = True)
+        else:                    self.__stdout.write(level, text, flush = level == LEVEL_WARNING)
 
 
     def write_debug(self, text, *args):
@@ -168,9 +509,8 @@ class StdioLogger(LoggerBase):
             args (tuple) : Arguments to use when formatting the text.
 
         """
-        if not self._debug_level_enabled: return
-        message = str(datetime.datetime.now()) + ' [debug] ' + text.format(*args) + '\n'
-        sys.stdout.write(message)
+        if not self._enabled_mask & MASK_DEBUG: return
+        self.__stdout.write(LEVEL_DEBUG, _fmt(text, args))
 
 
     def write_info(self, text, *args):
@@ -182,9 +522,8 @@ class StdioLogger(LoggerBase):
             args (tuple) : Arguments to use when formatting the text.
 
         """
-        if not self._info_level_enabled: return
-        message = str(datetime.datetime.now()) + ' [info] ' + text.format(*args) + '\n'
-        sys.stdout.write(message)
+        if not self._enabled_mask & MASK_INFO: return
+        self.__stdout.write(LEVEL_INFO, _fmt(text, args))
 
 
     def write_note(self, text, *args):
@@ -196,9 +535,8 @@ class StdioLogger(LoggerBase):
             args (tuple) : Arguments to use when formatting the text.
 
         """
-        if not self._note_level_enabled: return
-        message = str(datetime.datetime.now()) + ' [note] ' + text.format(*args) + '\n'
-        sys.stdout.write(message)
+        if not self._enabled_mask & MASK_NOTE: return
+        self.__stdout.write(LEVEL_NOTE, _fmt(text, args))
 
 
     def write_warning(self, text, *args):
@@ -210,9 +548,8 @@ class StdioLogger(LoggerBase):
             args (tuple) : Arguments to use when formatting the text.
 
         """
-        if not self._warning_level_enabled: return
-        message = str(datetime.datetime.now()) + ' [warning] ' + text.format(*args) + '\n'
-        sys.stdout.write(message)
+        if not self._enabled_mask & MASK_WARNING: return
+        self.__stdout.write(LEVEL_WARNING, _fmt(text, args), flush = True)
 
 
     def write_error(self, text, *args):
@@ -224,9 +561,8 @@ class StdioLogger(LoggerBase):
             args (tuple) : Arguments to use when formatting the text.
 
         """
-        if not self._error_level_enabled: return
-        message = str(datetime.datetime.now()) + ' [error] ' + text.format(*args) + '\n'
-        sys.stderr.write(message)
+        if not self._enabled_mask & MASK_ERROR: return
+        self.__stderr.write(LEVEL_ERROR, _fmt(text, args), flush = True)
 
 
     @property
@@ -251,6 +587,16 @@ class FileLogger(LoggerBase):
     """
 
     __path = None
+    __file = None
+
+    # tags of the messages by severity level
+    __prefixes = {
+        LEVEL_ERROR   : _ERROR_PREFIX,
+        LEVEL_WARNING : _WARNING_PREFIX,
+        LEVEL_NOTE    : _NOTE_PREFIX,
+        LEVEL_INFO    : _INFO_PREFIX,
+        LEVEL_DEBUG   : _DEBUG_PREFIX,
+    }
 
     def __init__(self, path):
         """
@@ -262,6 +608,56 @@ class FileLogger(LoggerBase):
         """
         super().__init__()
         self.__path = path
+        atexit.register(self.close)
+
+
+    def __write(self, message, flush = False):
+        """
+        Writes a formatted message to the log file (the file is opened on first use and kept open).
+        The file is opened in binary append mode and each message is encoded once, so no text layer is involved.
+        Messages are collected in a 64 KiB buffer, so multiple messages are written to the file at once (warnings and
+        errors are written immediately, the startup script flushes the log after each command).
+
+        Args:
+            message (str)          : Message to write.
+            flush (bool, optional) : True to write buffered messages to the file immediately; otherwise False.
+
+        """
+        if not self.__file:
+            self.__file = open(self.__path, "ab", buffering=FILE_LOGGER_BUFFER_SIZE)
+        self.__file.write(message.encode("utf-8"))
+        if flush: self.__file.flush()
+
+
+    def flush(self):
+        """
+        Writes buffered messages to the log file.
+
+        """
+        if self.__file:
+            self.__file.flush()
+
+
+    def close(self):
+        """
+        Closes the log file.
+
+        """
+        if self.__file:
+            self.__file.close()
+            self.__file = None
+
+
+    def _write_formatted(self, level, text):
+        """
+        Writes a message that has been formatted already (the caller must have checked that the level is enabled).
+
+        Args:
+            level (int) : Severity level of the message.
+            text (str)  : Formatted text to write to the log.
+
+        """
+        self.__write("{0}{1}{2}\n".format(_now_str(), self.__prefixes[level], text), flush = level <= LEVEL_WARNING)
 
 
     def write_debug(self, text, *args):
@@ -273,10 +669,9 @@ class FileLogger(LoggerBase):
             args (tuple) : Arguments to use when formatting the text.
 
         """
-        if not self._debug_level_enabled: return
-        message = str(datetime.datetime.now()) + ' [debug] ' + text.format(*args) + '\n'
-        with open(self.__path, "a+", encoding="utf-8") as text_file:
-           text_file.write(message)
+        if not self._enabled_mask & MASK_DEBUG: return
+        message = "{0}{1}{2}\n".format(_now_str(), _DEBUG_PREFIX, _fmt(text, args))
+        self.__write(message)
 
 
     def write_info(self, text, *args):
@@ -288,10 +683,9 @@ class FileLogger(LoggerBase):
             args (tuple) : Arguments to use when formatting the text.
 
         """
-        if not self._info_level_enabled: return
-        message = str(datetime.datetime.now()) + ' [info] ' + text.format(*args) + '\n'
-        with open(self.__path, "a+", encoding="utf-8") as text_file:
-           text_file.write(message)
+        if not self._enabled_mask & MASK_INFO: return
+        message = "{0}{1}{2}\n".format(_now_str(), _INFO_PREFIX, _fmt(text, args))
+        self.__write(message)
 
 
     def write_note(self, text, *args):
@@ -303,10 +697,9 @@ class FileLogger(LoggerBase):
             args (tuple) : Arguments to use when formatting the text.
 
         """
-        if not self._note_level_enabled: return
-        message = str(datetime.datetime.now()) + ' [note] ' + text.format(*args) + '\n'
-        with open(self.__path, "a+", encoding="utf-8") as text_file:
-           text_file.write(message)
+        if not self._enabled_mask & MASK_NOTE: return
+        message = "{0}{1}{2}\n".format(_now_str(), _NOTE_PREFIX, _fmt(text, args))
+        self.__write(message)
 
 
     def write_warning(self, text, *args):
@@ -318,10 +711,9 @@ class FileLogger(LoggerBase):
             args (tuple) : Arguments to use when formatting the text.
 
         """
-        if not self._warning_level_enabled: return
-        message = str(datetime.datetime.now()) + ' [warning] ' + text.format(*args) + '\n'
-        with open(self.__path, "a+", encoding="utf-8") as text_file:
-           text_file.write(message)
+        if not self._enabled_mask & MASK_WARNING: return
+        message = "{0}{1}{2}\n".format(_now_str(), _WARNING_PREFIX, _fmt(text, args))
+        self.__write(message, flush = True)
 
 
     def write_error(self, text, *args):
@@ -333,15 +725,28 @@ class FileLogger(LoggerBase):
             args (tuple) : Arguments to use when formatting the text.
 
         """
-        if not self._error_level_enabled: return
-        message = str(datetime.datetime.now()) + ' [error] ' + text.format(*args) + '\n'
-        with open(self.__path, "a+", encoding="utf-8") as text_file:
-           text_file.write(message)
+        if not self._enabled_mask & MASK_ERROR: return
+        message = "{0}{1}{2}\n".format(_now_str(), _ERROR_PREFIX, _fmt(text, args))
+        self.__write(message, flush = True)
 
 
 # ---------------------------------------------------------------------------------------------------------------------
 
 
+# severities of syslog messages by severity level
+_SYSLOG_SEVERITIES = {
+    LEVEL_ERROR   : LOG_ERR,
+    LEVEL_WARNING : LOG_WARNING,
+    LEVEL_NOTE    : LOG_NOTICE,
+    LEVEL_INFO    : LOG_INFO,
+    LEVEL_DEBUG   : LOG_DEBUG,
+}
+
+
+# ident and facility syslog has been opened with (None, if syslog is not open)
+_syslog_settings = None
+
+
 class SyslogLogger(LoggerBase):
     """
     A logger that writes messages to syslog.
@@ -361,6 +766,46 @@ class SyslogLogger(LoggerBase):
         # use the container name as ident
         self.__ident = "Docker ({0})".format(socket.gethostname())
 
+        # open the connection to syslog once (instead of opening/closing it for every message)
+        self.__open()
+
+
+    def __open(self):
+        """
+        Opens the connection to syslog using the ident and facility of the logger, if it is not open already.
+        The connection is shared by the entire process, so it is reopened, if another logger has changed it.
+
+        """
+        global _syslog_settings
+        settings = (self.__ident, self.__facility)
+        if _syslog_settings != settings:
+            openlog(ident = self.__ident, facility = self.__facility)
+            _syslog_settings = settings
+
+
+    def close(self):
+        """
+        Closes the connection to syslog.
+
+        """
+        global _syslog_settings
+        if _syslog_settings == (self.__ident, self.__facility):
+            closelog()
+            _syslog_settings = None
+
+
+    def _write_formatted(self, level, text):
+        """
+        Writes a message that has been formatted already (the caller must have checked that the level is enabled).
+
+        Args:
+            level (int) : Severity level of the message.
+            text (str)  : Formatted text to write to the log.
+
+        """
+        self.__open()
+        syslog(_SYSLOG_SEVERITIES[level], text)
+
 
     def write_debug(self, text, *args):
         """
@@ -371,11 +816,10 @@ class SyslogLogger(LoggerBase):
             args (tuple) : Arguments to use when formatting the text.
 
         """
-        if not self._debug_level_enabled: return
-        message = text.format(*args)
-        openlog(ident = self.__ident, facility = self.__facility)
+        if not self._enabled_mask & MASK_DEBUG: return
+        message = _fmt(text, args)
+        self.__open()
         syslog(LOG_DEBUG, message)
-        closelog()
 
 
     def write_info(self, text, *args):
@@ -387,11 +831,10 @@ class SyslogLogger(LoggerBase):
             args (tuple) : Arguments to use when formatting the text.
 
         """
-        if not self._debug_level_enabled: return
-        message = text.format(*args)
-        openlog(ident = self.__ident, facility = self.__facility)
+        if not self._enabled_mask & MASK_INFO: return
+        message = _fmt(text, args)
+        self.__open()
         syslog(LOG_INFO, message)
-        closelog()
 
 
     def write_note(self, text, *args):
@@ -403,11 +846,10 @@ class SyslogLogger(LoggerBase):
             args (tuple) : Arguments to use when formatting the text.
 
         """
-        if not self._note_level_enabled: return
-        message = text.format(*args)
-        openlog(ident = self.__ident, facility = self.__facility)
+        if not self._enabled_mask & MASK_NOTE: return
+        message = _fmt(text, args)
+        self.__open()
         syslog(LOG_NOTICE, message)
-        closelog()
 
 
     def write_warning(self, text, *args):
@@ -419,11 +861,10 @@ class SyslogLogger(LoggerBase):
             args (tuple) : Arguments to use when formatting the text.
 
         """
-        if not self._warning_level_enabled: return
-        message = text.format(*args)
-        openlog(ident = self.__ident, facility = self.__facility)
-        syslog(LOG_WARN, message)
-        closelog()
+        if not self._enabled_mask & MASK_WARNING: return
+        message = _fmt(text, args)
+        self.__open()
+        syslog(LOG_WARNING, message)
 
 
     def write_error(self, text, *args):
@@ -435,11 +876,10 @@ class SyslogLogger(LoggerBase):
             args (tuple) : Arguments to use when formatting the text.
 
         """
-        if not self._error_level_enabled: return
-        message = text.format(*args)
-        openlog(ident = self.__ident, facility = self.__facility)
+        if not self._enabled_mask & MASK_ERROR: return
+        message = _fmt(text, args)
+        self.__open()
         syslog(LOG_ERR, message)
-        closelog()
 
 
 # ---------------------------------------------------------------------------------------------------------------------
@@ -451,7 +891,7 @@ class CombinedLogger(LoggerBase):
 
     """
 
-    __loggers = []
+    __loggers = None
 
     def __init__(self, *loggers):
         """
@@ -461,8 +901,24 @@ class CombinedLogger(LoggerBase):
             loggers (LoggerBase) : Loggers to combine.
 
         """
+        self.__loggers = [] # per instance, must exist before the base class sets the verbosity
         super().__init__()
-        self.__loggers.extend(loggers)
+        for logger in loggers:
+            self.add(logger)
+
+
+    def _update_enabled_mask(self):
+        """
+        Combines the severity levels logged by the combined loggers into the mask of the instance, so writers can skip
+        messages that none of the combined loggers would log with a single bit test. Called by the combined loggers
+        whenever their verbosity changes, so the mask stays up to date.
+
+        """
+        mask = 0
+        for logger in self.__loggers:
+            mask |= logger._enabled_mask
+        self._enabled_mask = mask
+        self._notify_observers()
 
 
     def write_debug(self, text, *args):
@@ -474,8 +930,10 @@ class CombinedLogger(LoggerBase):
             args (tuple) : Arguments to use when formatting the text.
 
         """
+        if not self._enabled_mask & MASK_DEBUG: return
+        text = _fmt(text, args)
         for logger in self.__loggers:
-            logger.write_debug(text, *args)
+            if logger._enabled_mask & MASK_DEBUG: logger._write_formatted(LEVEL_DEBUG, text)
 
 
     def write_info(self, text, *args):
@@ -487,8 +945,10 @@ class CombinedLogger(LoggerBase):
             args (tuple) : Arguments to use when formatting the text.
 
         """
+        if not self._enabled_mask & MASK_INFO: return
+        text = _fmt(text, args)
         for logger in self.__loggers:
-            logger.write_info(text, *args)
+            if logger._enabled_mask & MASK_INFO: logger._write_formatted(LEVEL_INFO, text)
 
 
     def write_note(self, text, *args):
@@ -500,8 +960,10 @@ class CombinedLogger(LoggerBase):
             args (tuple) : Arguments to use when formatting the text.
 
         """
+        if not self._enabled_mask & MASK_NOTE: return
+        text = _fmt(text, args)
         for logger in self.__loggers:
-            logger.write_note(text, *args)
+            if logger._enabled_mask & MASK_NOTE: logger._write_formatted(LEVEL_NOTE, text)
 
 
     def write_warning(self, text, *args):
@@ -513,8 +975,10 @@ class CombinedLogger(LoggerBase):
             args (tuple) : Arguments to use when formatting the text.
 
         """
+        if not self._enabled_mask & MASK_WARNING: return
+        text = _fmt(text, args)
         for logger in self.__loggers:
-            logger.write_warning(text, *args)
+            if logger._enabled_mask & MASK_WARNING: logger._write_formatted(LEVEL_WARNING, text)
 
 
     def write_error(self, text, *args):
@@ -526,8 +990,10 @@ class CombinedLogger(LoggerBase):
             args (tuple) : Arguments to use when formatting the text.
 
         """
+        if not self._enabled_mask & MASK_ERROR: return
+        text = _fmt(text, args)
         for logger in self.__loggers:
-            logger.write_error(text, *args)
+            if logger._enabled_mask & MASK_ERROR: logger._write_formatted(LEVEL_ERROR, text)
 
 
     def set_verbosity(self, level):
@@ -544,6 +1010,7 @@ class CombinedLogger(LoggerBase):
         """
         for logger in self.__loggers:
             logger.set_verbosity(level)
+        self._update_enabled_mask()
 
 
     @property
@@ -561,6 +1028,24 @@ class CombinedLogger(LoggerBase):
         return False
 
 
+    def flush(self):
+        """
+        Writes buffered messages of all combined loggers.
+
+        """
+        for logger in self.__loggers:
+            logger.flush()
+
+
+    def close(self):
+        """
+        Closes all combined loggers.
+
+        """
+        for logger in self.__loggers:
+            logger.close()
+
+
     def add(self, logger):
         """
         Adds a logger to the combined logger.
@@ -573,38 +1058,74 @@ class CombinedLogger(LoggerBase):
             raise ValueError("The specified logger does not derive from 'LoggerBase'.")
 
         self.__loggers.append(logger)
+        logger._add_observer(self._update_enabled_mask)
+        self._update_enabled_mask()
 
 
 # ---------------------------------------------------------------------------------------------------------------------
 
 
-class Log(object):
+class _LogMeta(type):
     """
-    The application's log.
+    Metaclass of the Log class providing the 'instance' property at class level.
+    Setting the instance binds the writer methods of the Log class directly to the writer methods of the instance,
+    so writing a message does not need to look up the instance first. The writers are bound again whenever the
+    instance replaces its writer methods (e.g. when its verbosity changes).
 
     """
 
-    __instance = None
-
-
-    @classproperty
+    @property
     def instance(cls):
         """
         Gets the singleton instance of the Log.
 
         """
-        if not Log.__instance:
-            Log.__instance = StdioLogger()
-        return Log.__instance
+        if not cls._instance:
+            cls.instance = StdioLogger()
+        return cls._instance
 
 
     @instance.setter
     def instance(cls, value):
         """
-        Sets the singleton instance of the Log.
+        Sets the singleton instance of the Log (None to fall back to a new StdioLogger).
 
         """
-        Log.__instance = value
+        if value == None: value = StdioLogger()
+        if cls._instance: cls._instance._remove_observer(cls._bind_writers)
+        cls._instance = value
+        value._add_observer(cls._bind_writers)
+        cls._bind_writers()
+
+
+class Log(object, metaclass=_LogMeta):
+    """
+    The application's log.
+
+    The text passed to the writer methods may contain placeholders ('{0}', '{1}', ...) that are replaced with the
+    specified arguments. Pass the arguments instead of formatting the text in advance (str.format() or f-strings),
+    so messages of disabled severity levels are not formatted at all. Arguments that are expensive to build can be
+    deferred using write_debug_lazy(). This is a convention only, no tool checks it for the Log class.
+
+    Text containing braces is always formatted, even without arguments, so literal braces must be escaped ('{{', '}}').
+
+    """
+
+    _instance = None
+
+    # names of the writer methods bound to the writer methods of the instance
+    __writers = ("write_debug", "write_info", "write_note", "write_warning", "write_error", "write_debug_lazy")
+
+
+    @classmethod
+    def _bind_writers(cls):
+        """
+        Binds the writer methods of the Log class to the writer methods of the current instance (called by the instance
+        whenever it replaces its writer methods).
+
+        """
+        for name in cls.__writers:
+            setattr(cls, name, staticmethod(getattr(cls._instance, name)))
 
 
     @staticmethod
@@ -617,7 +1138,8 @@ class Log(object):
             args (list) : Arguments to use when formatting the text.
 
         """
-        Log.instance.write_debug(text, *args)
+        instance = Log.instance
+        if instance.is_enabled_for(LEVEL_DEBUG): instance.write_debug(text, *args)
 
 
     @staticmethod
@@ -630,7 +1152,8 @@ class Log(object):
             args (tuple) : Arguments to use when formatting the text.
 
         """
-        Log.instance.write_info(text, *args)
+        instance = Log.instance
+        if instance.is_enabled_for(LEVEL_INFO): instance.write_info(text, *args)
 
 
     @staticmethod
@@ -643,7 +1166,8 @@ class Log(object):
             args (list) : Arguments to use when formatting the text.
 
         """
-        Log.instance.write_note(text, *args)
+        instance = Log.instance
+        if instance.is_enabled_for(LEVEL_NOTE): instance.write_note(text, *args)
 
 
     @staticmethod
@@ -656,7 +1180,8 @@ class Log(object):
             args (list) : Arguments to use when formatting the text.
 
         """
-        Log.instance.write_warning(text, *args)
+        instance = Log.instance
+        if instance.is_enabled_for(LEVEL_WARNING): instance.write_warning(text, *args)
 
 
     @staticmethod
@@ -669,7 +1194,20 @@ class Log(object):
             args (list) : Arguments to use when formatting the text.
 
         """
-        Log.instance.write_error(text, *args)
+        instance = Log.instance
+        if instance.is_enabled_for(LEVEL_ERROR): instance.write_error(text, *args)
+
+
+    @staticmethod
+    def write_debug_lazy(func):
+        """
+        Writes a debug message to the log, building the message only, if debug messages are logged.
+
+        Args:
+            func (callable) : Function returning the text to write to the log (not formatted any further).
+
+        """
+        Log.instance.write_debug_lazy(func)
 
 
     @classproperty
@@ -684,6 +1222,30 @@ class Log(object):
         return Log.instance.uses_stdio
 
 
+    @staticmethod
+    def flush():
+        """
+        Writes buffered messages.
+
+        """
+        Log.instance.flush()
+
+
+    @staticmethod
+    def is_enabled_for(level):
+        """
+        Checks whether messages of the specified severity level are logged.
+
+        Args:
+            level (int) : Severity level to check (LEVEL_ERROR, LEVEL_WARNING, LEVEL_NOTE, LEVEL_INFO or LEVEL_DEBUG).
+
+        Returns:
+            True, if messages of the specified level are logged; otherwise False.
+
+        """
+        return Log.instance.is_enabled_for(level)
+
+
     @staticmethod
     def set_verbosity(level):
         """
@@ -7,7 +7,6 @@ License: MIT License
 import os
 import shutil
 import socket
-import sys
 
 from cryptography import x509
 from cryptography.hazmat.backends import default_backend
@@ -25,10 +24,10 @@ from subprocess import run, DEVNULL
 from ..gp_log import Log
 from ..gp_cmdproc import CommandProcessor, PositionalArgument, NamedArgument
 from ..gp_errors import ExitCodeError, FileNotFoundError, GeneralError, CommandLineArgumentError, IoError, EXIT_CODE_SUCCESS
-from ..gp_helpers import read_text_file, write_text_file, print_error, readline_if_no_tty, \
+from ..gp_helpers import read_text_file, write_text_file, print_error, readline_if_no_tty, is_stdin_tty, \
                          get_env_setting_bool, get_env_setting_integer, get_env_setting_string, \
-                         iptables_run, iptables_add, ip6tables_run, ip6tables_add, \
-                         does_mount_point_exist, is_mount_point_readonly, \
+                         iptables_run, iptables_add, ip6tables_run, ip6tables_add, iptables_commit, \
+                         does_mount_point_exist, is_mount_point_readonly, invalidate_mount_cache, \
                          load_kernel_module, resolve_hostnames, \
                          is_email_address
 from . import gp_ca
@@ -281,7 +280,7 @@ class VpnCommandProcessor(CommandProcessor):
 
         # query user to enter the password, if it was not specified in the command line
         if ca_pass == None:
-            if sys.stdin.isatty():
+            if is_stdin_tty():
                 ca_pass = getpass("Please enter the password to protect the CA with: ").strip()
                 if len(ca_pass) > 0:
                     ca_pass_verify = getpass("Please enter the password once again: ").strip()
@@ -379,7 +378,7 @@ class VpnCommandProcessor(CommandProcessor):
         # query user to enter the password for the PKCS12 file, if it was not specified in the command line
         # -----------------------------------------------------------------------------------------
         if pkcs12_pass == None:
-            if sys.stdin.isatty():
+            if is_stdin_tty():
                 pkcs12_pass = getpass("Please enter the password for the PKCS12 file: ").strip()
                 if len(pkcs12_pass) > 0:
                     pkcs12_pass_verify = getpass("Please enter the password once again: ").strip()
@@ -825,9 +824,9 @@ class VpnCommandProcessor(CommandProcessor):
         self.__ip_addresses_by_hostname = resolve_hostnames(self.__vpn_hostnames)
         for hostname,(ipv4_addresses,ipv6_addresses) in self.__ip_addresses_by_hostname.items():
             if len(ipv4_addresses) > 0:
-                Log.write_info("- {0} : {1}".format(hostname, ",".join(ipv4_addresses)))
+                Log.write_info("- {0} : {1}", hostname, ",".join(ipv4_addresses))
             if len(ipv6_addresses) > 0:
-                Log.write_info("- {0} : {1}".format(hostname, ",".join(ipv6_addresses)))
+                Log.write_info("- {0} : {1}", hostname, ",".join(ipv6_addresses))
 
         # setup cryptographic stuff
         # -------------------------------------------------------------------------------------------------------------
@@ -915,6 +914,7 @@ class VpnCommandProcessor(CommandProcessor):
         if does_mount_point_exist("/proc/sys") and is_mount_point_readonly("/proc/sys"):
             Log.write_info("Remounting /proc/sys read-write...")
             run(["mount", "-o", "remount,rw", "/proc/sys"], check=True, stdout=DEVNULL)
+            invalidate_mount_cache()
             sys_proc_remounted_rw = True
 
         # link the certificate and the CRL of the internal CA into /etc/swanctl/[x509ca|x509crl]
@@ -1260,11 +1260,16 @@ class VpnCommandProcessor(CommandProcessor):
                           "-t", "nat",
                           "-s", str(self.__client_subnet_ipv6)])
 
+        # apply the queued firewall rules at once
+        # -------------------------------------------------------------------------------------------------------------
+        iptables_commit()
+
         # remount /proc/sys read-only again
         # -------------------------------------------------------------------------------------------------------------
         if sys_proc_remounted_rw:
             Log.write_info("Remounting /proc/sys read-only...")
             run(["mount", "-o", "remount,ro", "/proc/sys"], check=True, stdout=DEVNULL)
+            invalidate_mount_cache()
 
 
     # -------------------------------------------------------------------------------------------------------------------------------------
@@ -1353,7 +1358,7 @@ class VpnCommandProcessor(CommandProcessor):
                 # creating a new certficate requires the private key of the CA
                 ca_pass = named_args["ca-pass"][0] if "ca-pass" in named_args and len(named_args["ca-pass"]) > 0 else None
                 if ca_pass == None:
-                    if sys.stdin.isatty():
+                    if is_stdin_tty():
                         ca_pass = getpass("Please enter the password of the CA: ").strip()
                     else:
                         raise gp_ca.PasswordRequiredError("Please specify the CA password as command line argument or run the container in terminal mode, if you want to enter the password interactively.")
@@ -1676,8 +1681,8 @@ class VpnCommandProcessor(CommandProcessor):
         out_format               = named_args["out-format"][0] if "out-format" in named_args and len(named_args["out-format"]) > 0 else None
 
         if not out_format:
-            if sys.stdin.isatty(): out_format = "text"   # terminal mode
-            else:                  out_format = "tsv"    # script mode
+            if is_stdin_tty(): out_format = "text"   # terminal mode
+            else:              out_format = "tsv"    # script mode
 
         if not out_format.lower() in [ "text", "tsv" ]:
             raise CommandLineArgumentError("Output format ({0}) is not supported.", out_format)
@@ -1691,7 +1696,7 @@ class VpnCommandProcessor(CommandProcessor):
 
                 # query user to enter the CA password, if it was not specified in the command line
                 if ca_pass == None:
-                    if sys.stdin.isatty():
+                    if is_stdin_tty():
                         ca_pass = getpass("Please enter the password of the CA: ").strip()
                     else:
                         raise gp_ca.PasswordRequiredError("Please specify the CA password as command line argument or run the container in terminal mode, if you want to enter the password interactively.")
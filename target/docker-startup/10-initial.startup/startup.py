@@ -8,8 +8,8 @@ License: MIT License
 
 import sys
 
-from gp_startup import App
+from gp_startup import run
 
 # run the application
-exitcode = App.run()
+exitcode = run()
 sys.exit(exitcode)
\ No newline at end of file